@@ -0,0 +1,179 @@
+"""Append-only checkpoints to resume interrupted games."""
+
+import json
+import os
+import random
+from typing import Optional
+
+
+class Checkpoint:
+    """Checkpoint class to periodically save the state of a game.
+
+    The checkpoint is a JSON Lines file. The first line is a header describing the
+    match, every following line holds the rounds played since the previous line and a
+    snapshot of the state at the end of them. Lines are only ever appended, so the cost
+    of a write depends on the number of new rounds and not on the length of the match.
+
+    Attributes:
+        path (str): Path of the checkpoint file.
+        every (int): Number of rounds buffered before they are written to the file.
+
+    Methods:
+        start: Starts a new checkpoint file or reopens an existing one.
+        record: Records the state of the game after a completed round.
+        flush: Writes the buffered rounds to the checkpoint file.
+        mark: Marks the current history and rounds of the game as already recorded.
+    """
+
+    def __init__(self, path: str, every: int = 1):
+        """Initializes the Checkpoint with the given path and write frequency.
+
+        Args:
+            path (str): Path of the checkpoint file.
+            every (int): Number of rounds buffered before they are written to the file.
+
+        Raises:
+            ValueError: If every is lower than 1.
+        """
+        if every < 1:
+            raise ValueError("Checkpoint frequency must be at least 1 round")
+        self.path = path
+        self.every = every
+        self._pending = []
+        self._history_mark = 0
+        self._rounds_mark = 0
+
+    def start(self, mode: str, target: int, resume: bool = False):
+        """Starts a new checkpoint file or reopens an existing one.
+
+        Args:
+            mode (str): The game mode (first_to or best_of).
+            target (int): The target score or the number of rounds of the game.
+            resume (bool): Whether to append to an existing checkpoint file.
+
+        Raises:
+            FileExistsError: If a new checkpoint file is started but the file already
+                exists, so that a game is not overwritten by forgetting to resume it.
+        """
+        self._pending = []
+        if resume:
+            # Drop a partially written last line so that new lines stay readable
+            with open(self.path, "r+", encoding="utf-8") as file:
+                content = file.read()
+                file.truncate(len(content[: content.rfind("\n") + 1].encode("utf-8")))
+            return
+        try:
+            file = open(self.path, "x", encoding="utf-8")
+        except FileExistsError as e:
+            raise FileExistsError(
+                f"Checkpoint {self.path} already exists, resume the game or delete it"
+            ) from e
+        with file:
+            file.write(json.dumps({"mode": mode, "target": target}) + "\n")
+
+    def record(self, game):
+        """Records the state of the game after a completed round.
+
+        Args:
+            game (Game): The game to record.
+        """
+        self._pending.append(
+            {
+                "history": game.history[self._history_mark :],
+                "rounds": game.rounds[self._rounds_mark :],
+                "state": game.get_state(),
+            }
+        )
+        self._history_mark = len(game.history)
+        self._rounds_mark = len(game.rounds)
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rounds to the checkpoint file."""
+        if not self._pending:
+            return
+        entry = {
+            "history": [m for p in self._pending for m in p["history"]],
+            "rounds": [r for p in self._pending for r in p["rounds"]],
+            "state": self._pending[-1]["state"],
+        }
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._pending = []
+
+    def mark(self, game):
+        """Marks the current history and rounds of the game as already recorded.
+
+        Args:
+            game (Game): The restored game.
+        """
+        self._history_mark = len(game.history)
+        self._rounds_mark = len(game.rounds)
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    """Loads a checkpoint file.
+
+    A truncated last line, e.g. if the process died while writing it, is ignored.
+
+    Args:
+        path (str): Path of the checkpoint file.
+
+    Returns:
+        Optional[dict]: Dictionary with the mode, target, history, rounds and the last
+            state of the game, or None if the file does not exist.
+
+    Raises:
+        ValueError: If the header is missing or unreadable, e.g. if the process died
+            while the file was created.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+
+    try:
+        header = json.loads(lines[0])
+        mode, target = header["mode"], header["target"]
+    except (IndexError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Checkpoint {path} has no readable header") from e
+    checkpoint = {
+        "mode": mode,
+        "target": target,
+        "history": [],
+        "rounds": [],
+        "state": None,
+    }
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        checkpoint["history"].extend(entry["history"])
+        checkpoint["rounds"].extend(entry["rounds"])
+        checkpoint["state"] = entry["state"]
+    return checkpoint
+
+
+def get_rng_state() -> list:
+    """Gets the state of the random module in a JSON serializable form.
+
+    Returns:
+        list: State of the random number generator.
+    """
+    version, internal_state, gauss_next = random.getstate()
+    return [version, list(internal_state), gauss_next]
+
+
+def set_rng_state(state: list):
+    """Sets the state of the random module from its JSON serializable form.
+
+    Args:
+        state (list): State of the random number generator.
+    """
+    version, internal_state, gauss_next = state
+    random.setstate((version, tuple(internal_state), gauss_next))
@@ -13,12 +13,16 @@ class GameConfig(BaseModel):
         mode: The game mode (first_to or best_of).
         target_score: The target score for the game.
         rounds: The number of rounds to play.
+        checkpoint_path: Optional path of the checkpoint file used to resume the game.
+        checkpoint_every: The number of rounds between two checkpoint writes.
     """
 
     rules: Literal["BASIC_RULES", "SPOCK_LIZARD"]
     mode: Literal["first_to", "best_of"]
     target_score: int
     rounds: int
+    checkpoint_path: Optional[str] = None
+    checkpoint_every: int = 1
 
 
 class PlayerConfig(BaseModel):
@@ -27,10 +31,15 @@ class PlayerConfig(BaseModel):
     Attributes:
         type: The type of player (HumanPlayer, ComputerPlayer, or LLMPlayer).
         name: The name of the player.
+        deadline: Seconds an LLMPlayer waits for the model before falling back.
+        fallback: The strategy of an LLMPlayer when the deadline passes (random or
+            equilibrium).
     """
 
     type: Literal["HumanPlayer", "ComputerPlayer", "LLMPlayer"]
     name: str
+    deadline: Optional[float] = None
+    fallback: Literal["random", "equilibrium"] = "random"
 
 
 class RulesConfig(BaseModel):
@@ -0,0 +1,687 @@
+"""Distributed tournaments with a coordinator and workers communicating over TCP."""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import yaml
+
+from rps_games.configs.config import GameConfig, PlayerConfig, RulesConfig
+from rps_games.game import Game, RuleSet, init_player
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs")
+
+
+def _send(file, message: dict):
+    """Sends a message as a line of JSON.
+
+    Args:
+        file: Binary file object of the socket.
+        message (dict): Message to send.
+    """
+    file.write(json.dumps(message).encode("utf-8") + b"\n")
+    file.flush()
+
+
+def _receive(file) -> Optional[dict]:
+    """Receives a message sent with _send.
+
+    Args:
+        file: Binary file object of the socket.
+
+    Returns:
+        Optional[dict]: The received message, or None if the connection was closed.
+    """
+    line = file.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def _is_valid(message) -> bool:
+    """Checks that a message from a worker is a heartbeat or a well formed request.
+
+    Args:
+        message: The received message.
+
+    Returns:
+        bool: True if the message can be handled.
+    """
+    if not isinstance(message, dict):
+        return False
+    if message.get("type") == "heartbeat":
+        return isinstance(message.get("done"), int)
+    results = message.get("results")
+    return (
+        message.get("type") == "request"
+        and isinstance(results, list)
+        and all(isinstance(result, dict) and "job_id" in result for result in results)
+    )
+
+
+def _load_yaml(file_name: str) -> dict:
+    """Loads a YAML file from the configs directory.
+
+    Args:
+        file_name (str): Name of the file.
+
+    Returns:
+        dict: Content of the file.
+    """
+    with open(os.path.join(CONFIGS_DIR, file_name), "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def make_jobs(
+    config: dict, matches: int, games_per_job: int = 1, seed: int = 0
+) -> list[dict]:
+    """Creates the match jobs of a tournament from a game configuration.
+
+    Args:
+        config (dict): Game configuration dictionary.
+        matches (int): Number of jobs.
+        games_per_job (int): Number of games played in every job.
+        seed (int): Seed of the first job, the following jobs use the next seeds.
+
+    Returns:
+        list[dict]: Jobs with the rule set name, player configurations, seed and mode.
+
+    Raises:
+        ValueError: If a player is a HumanPlayer, who cannot play on a remote worker.
+    """
+    game_config = GameConfig(**config["game"])
+    player_a = PlayerConfig(**config["players"]["player_one"])
+    player_b = PlayerConfig(**config["players"]["player_two"])
+    if "HumanPlayer" in (player_a.type, player_b.type):
+        raise ValueError("HumanPlayer cannot play in a distributed tournament")
+    target = (
+        game_config.target_score
+        if game_config.mode == "first_to"
+        else game_config.rounds
+    )
+    return [
+        {
+            "job_id": job_id,
+            "rules": game_config.rules,
+            "mode": game_config.mode,
+            "target": target,
+            "player_a": player_a.model_dump(),
+            "player_b": player_b.model_dump(),
+            "seed": seed + job_id,
+            "games": games_per_job,
+        }
+        for job_id in range(matches)
+    ]
+
+
+def run_job(job: dict, defined_rules: dict) -> dict:
+    """Plays the games of a job and aggregates their results.
+
+    Args:
+        job (dict): Job as created by make_jobs.
+        defined_rules (dict): Defined rules dictionary.
+
+    Returns:
+        dict: Number of wins of each player, draws and rounds played in the job.
+    """
+    chosen_rule_set = getattr(RulesConfig(**defined_rules), job["rules"])
+    rule_set = RuleSet(chosen_rule_set)
+    result = {
+        "job_id": job["job_id"],
+        "wins_a": 0,
+        "wins_b": 0,
+        "draws": 0,
+        "rounds": 0,
+    }
+
+    random.seed(job["seed"])
+    for _ in range(job["games"]):
+        player_a = init_player(PlayerConfig(**job["player_a"]), chosen_rule_set)
+        player_b = init_player(PlayerConfig(**job["player_b"]), chosen_rule_set)
+        game = Game(player_a, player_b, rule_set)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if job["mode"] == "first_to":
+                winner = game.play_first_to(score=job["target"])
+            else:
+                winner = game.play_best_of(rounds=job["target"])
+
+        if winner is None:
+            result["draws"] += 1
+        elif winner is player_a:
+            result["wins_a"] += 1
+        else:
+            result["wins_b"] += 1
+        result["rounds"] += game.round_num
+    return result
+
+
+def summarize(results: dict[int, dict]) -> dict:
+    """Sums the results of all the jobs.
+
+    Args:
+        results (dict[int, dict]): Results of the jobs by job id.
+
+    Returns:
+        dict: Total number of wins of each player, draws and rounds.
+    """
+    keys = ("wins_a", "wins_b", "draws", "rounds")
+    return {key: sum(result[key] for result in results.values()) for key in keys}
+
+
+class Coordinator:
+    """Coordinator class to distribute the jobs of a tournament to workers.
+
+    Every worker owns a queue of jobs and takes batches from it. A worker whose queue is
+    empty steals half of the largest queue, where the jobs not yet assigned to any
+    worker count as a queue too. If a worker disconnects, does not answer within the
+    timeout or finishes no job within the job timeout, its queued and running jobs are
+    put back to be dispatched again. A job
+    that was running on max_attempts failed workers is given up instead. Results are
+    merged by job id, so a job that is reported twice is only counted once.
+
+    Attributes:
+        jobs (dict[int, dict]): Jobs by job id.
+        results (dict[int, dict]): Results of the finished jobs by job id.
+        failed (list[int]): Ids of the jobs that were given up.
+        batch_size (int): Number of jobs sent to a worker at once.
+        timeout (float): Seconds without any message, including heartbeats, after
+            which a worker is considered failed.
+        job_timeout (float): Seconds a worker may run a batch without finishing any
+            of its jobs before it is considered failed, as reported by its heartbeats.
+        max_attempts (int): Number of failed workers a job may run on before it is
+            given up.
+        address (tuple[str, int]): Host and port the coordinator listens on.
+
+    Methods:
+        run: Serves the workers until all the jobs are finished or given up.
+        finished: Whether every job has a result or was given up.
+        merge: Merges the results sent by a worker.
+        close: Stops listening for workers.
+    """
+
+    def __init__(
+        self,
+        jobs: list[dict],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_size: int = 1,
+        timeout: float = 60.0,
+        job_timeout: float = 600.0,
+        max_attempts: int = 3,
+    ):
+        """Initializes the Coordinator and starts listening for workers.
+
+        Args:
+            jobs (list[dict]): Jobs of the tournament.
+            host (str): Host to listen on.
+            port (int): Port to listen on, 0 to choose a free port.
+            batch_size (int): Number of jobs sent to a worker at once.
+            timeout (float): Seconds without any message, including heartbeats, after
+                which a worker is considered failed.
+            job_timeout (float): Seconds a worker may run a batch without finishing
+                any of its jobs before it is considered failed.
+            max_attempts (int): Number of failed workers a job may run on before it is
+                given up.
+        """
+        self.jobs = {job["job_id"]: job for job in jobs}
+        self.results = {}
+        self.failed = []
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self._attempts = dict.fromkeys(self.jobs, 0)
+        self._pool = deque(self.jobs)
+        self._queues = {}
+        self._in_flight = {}
+        self._next_worker_id = 0
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._stopped = threading.Event()
+        self._closed = threading.Event()
+        if not self.jobs:
+            self._done.set()
+        self._server = socket.create_server((host, port))
+        self._server.settimeout(0.1)
+        self.address = self._server.getsockname()
+
+    def run(
+        self,
+        deadline: Optional[float] = None,
+        stop_when: Optional[Callable[[], bool]] = None,
+    ) -> dict[int, dict]:
+        """Serves the workers until all the jobs are finished or given up.
+
+        Once run returns, workers that connect or ask for jobs are told to stop until
+        close is called.
+
+        Args:
+            deadline (Optional[float]): Seconds after which to stop even if there are
+                unfinished jobs, or None to wait until all the jobs are finished.
+            stop_when (Optional[Callable[[], bool]]): Called regularly, stops serving
+                when it returns True, e.g. when no worker is left.
+
+        Returns:
+            dict[int, dict]: Results of the jobs by job id, see finished to check
+                whether they are complete.
+        """
+        end = None if deadline is None else time.monotonic() + deadline
+        while not self._done.is_set():
+            if end is not None and time.monotonic() >= end:
+                logging.warning("Deadline passed with unfinished jobs")
+                break
+            if stop_when is not None and stop_when():
+                break
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        self._stopped.set()
+        threading.Thread(target=self._turn_away, daemon=True).start()
+        return self.results
+
+    def finished(self) -> bool:
+        """Whether every job has a result or was given up.
+
+        Returns:
+            bool: True if there is nothing left to run.
+        """
+        return self._done.is_set()
+
+    def close(self):
+        """Stops listening for workers."""
+        self._closed.set()
+        self._server.close()
+
+    def _turn_away(self):
+        """Tells the workers connecting after run returned to stop, until close."""
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(target=self._send_stop, args=(conn,), daemon=True).start()
+
+    def _send_stop(self, conn: socket.socket):
+        """Answers the first message of a worker with a stop message.
+
+        Args:
+            conn (socket.socket): Connection to the worker.
+        """
+        conn.settimeout(self.timeout)
+        try:
+            with conn, conn.makefile("rwb") as file:
+                if _receive(file) is not None:
+                    _send(file, {"type": "stop"})
+        except (OSError, ValueError):
+            pass
+
+    def merge(self, worker_id: int, results: list[dict]):
+        """Merges the results sent by a worker.
+
+        Args:
+            worker_id (int): Id of the worker.
+            results (list[dict]): Results of the jobs run by the worker.
+        """
+        with self._lock:
+            for result in results:
+                job_id = result["job_id"]
+                self._in_flight.get(worker_id, set()).discard(job_id)
+                if job_id in self.jobs and job_id not in self.results:
+                    self.results[job_id] = result
+            self._check_done()
+
+    def _check_done(self):
+        """Sets the done flag if every job has a result or was given up."""
+        if len(self.results) + len(self.failed) >= len(self.jobs):
+            self._done.set()
+
+    def _register(self) -> int:
+        """Registers a new worker.
+
+        Returns:
+            int: Id of the worker.
+        """
+        with self._lock:
+            worker_id = self._next_worker_id
+            self._next_worker_id += 1
+            self._queues[worker_id] = deque()
+            self._in_flight[worker_id] = set()
+        return worker_id
+
+    def _next_batch(self, worker_id: int) -> list[int]:
+        """Takes the next batch of jobs of a worker, stealing jobs if needed.
+
+        Args:
+            worker_id (int): Id of the worker.
+
+        Returns:
+            list[int]: Ids of the jobs in the batch, empty if there is nothing to do.
+        """
+        with self._lock:
+            queue = self._queues[worker_id]
+            if not queue:
+                self._steal(worker_id)
+            batch = [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+            self._in_flight[worker_id].update(batch)
+        return batch
+
+    def _steal(self, worker_id: int):
+        """Moves half of the largest queue to the queue of a worker.
+
+        Args:
+            worker_id (int): Id of the worker stealing jobs.
+        """
+        victims = [self._pool] + [
+            queue for other_id, queue in self._queues.items() if other_id != worker_id
+        ]
+        victim = max(victims, key=len)
+        queue = self._queues[worker_id]
+        for _ in range((len(victim) + 1) // 2):
+            queue.appendleft(victim.pop())
+
+    def _fail(self, worker_id: int):
+        """Puts the jobs of a failed worker back to be dispatched again.
+
+        The jobs that were running on the worker count as an attempt, and are given up
+        once they reach max_attempts.
+
+        Args:
+            worker_id (int): Id of the failed worker.
+        """
+        with self._lock:
+            queue = self._queues.pop(worker_id)
+            in_flight = self._in_flight.pop(worker_id)
+            for job_id in sorted(in_flight):
+                self._attempts[job_id] += 1
+            for job_id in list(queue) + sorted(in_flight):
+                if job_id in self.results or job_id in self.failed:
+                    continue
+                if self._attempts[job_id] >= self.max_attempts:
+                    self.failed.append(job_id)
+                    logging.warning(
+                        "Job %s failed on %s workers, it is given up",
+                        job_id,
+                        self._attempts[job_id],
+                    )
+                else:
+                    self._pool.append(job_id)
+            self._check_done()
+        logging.warning("Worker %s failed, its jobs are dispatched again", worker_id)
+
+    def _serve(self, conn: socket.socket):
+        """Serves a worker until all the jobs are finished or the worker fails.
+
+        Args:
+            conn (socket.socket): Connection to the worker.
+        """
+        worker_id = self._register()
+        conn.settimeout(self.timeout)
+        progress, progress_time = 0, time.monotonic()
+        try:
+            with conn, conn.makefile("rwb") as file:
+                while True:
+                    message = _receive(file)
+                    if not _is_valid(message):
+                        break
+                    if message["type"] == "heartbeat":
+                        # Heartbeats only show that the worker is alive, a job that
+                        # never finishes must still fail the worker
+                        if message["done"] != progress:
+                            progress, progress_time = message["done"], time.monotonic()
+                        elif time.monotonic() - progress_time > self.job_timeout:
+                            logging.warning("Worker %s made no progress", worker_id)
+                            break
+                        continue
+                    self.merge(worker_id, message["results"])
+                    if self._done.is_set() or self._stopped.is_set():
+                        _send(file, {"type": "stop"})
+                        break
+                    batch = self._next_batch(worker_id)
+                    progress, progress_time = 0, time.monotonic()
+                    if batch:
+                        jobs = [self.jobs[job_id] for job_id in batch]
+                        _send(file, {"type": "jobs", "jobs": jobs})
+                    else:
+                        _send(file, {"type": "wait"})
+        except (OSError, ValueError):
+            pass
+        finally:
+            if not self._done.is_set():
+                self._fail(worker_id)
+
+
+def _send_heartbeats(
+    send: Callable[[dict], None],
+    progress: Callable[[], int],
+    stop: threading.Event,
+    every: float,
+):
+    """Sends heartbeats with the progress of the batch until stop is set.
+
+    Args:
+        send (Callable[[dict], None]): Function sending a message to the coordinator.
+        progress (Callable[[], int]): Number of finished jobs of the batch.
+        stop (threading.Event): Event set when the heartbeats should stop.
+        every (float): Seconds between two heartbeats.
+    """
+    while not stop.wait(every):
+        try:
+            send({"type": "heartbeat", "done": progress()})
+        except OSError:
+            return
+
+
+def run_worker(
+    host: str,
+    port: int,
+    defined_rules: Optional[dict] = None,
+    wait: float = 0.05,
+    heartbeat: float = 5.0,
+):
+    """Runs jobs received from a coordinator until it has no more jobs.
+
+    Args:
+        host (str): Host of the coordinator.
+        port (int): Port of the coordinator.
+        defined_rules (Optional[dict]): Defined rules dictionary, by default the rules
+            in the configs directory.
+        wait (float): Seconds to wait before asking again when no job is available.
+        heartbeat (float): Seconds between two heartbeats while jobs are running, must
+            be lower than the timeout of the coordinator.
+    """
+    if defined_rules is None:
+        defined_rules = _load_yaml("rules.yaml")
+
+    # Workers play many games, logging every message would slow them down
+    logging.disable(logging.INFO)
+
+    # A broken connection means the coordinator stopped or gave up on this worker
+    with contextlib.suppress(OSError), socket.create_connection(
+        (host, port)
+    ) as conn, conn.makefile("rwb") as file:
+        lock = threading.Lock()
+
+        def send(message: dict):
+            with lock:
+                _send(file, message)
+
+        results = []
+        while True:
+            try:
+                send({"type": "request", "results": results})
+                message = _receive(file)
+            except OSError:
+                return
+            if message is None or message["type"] == "stop":
+                return
+            if message["type"] == "wait":
+                results = []
+                time.sleep(wait)
+                continue
+
+            results = []
+            stop = threading.Event()
+            threading.Thread(
+                target=_send_heartbeats,
+                args=(send, lambda: len(results), stop, heartbeat),
+                daemon=True,
+            ).start()
+            try:
+                for job in message["jobs"]:
+                    results.append(run_job(job, defined_rules))
+            finally:
+                stop.set()
+
+
+def run_local(
+    jobs: list[dict],
+    num_workers: int,
+    defined_rules: Optional[dict] = None,
+    batch_size: int = 1,
+) -> tuple[dict[int, dict], dict]:
+    """Runs the jobs with a coordinator and local worker processes.
+
+    Args:
+        jobs (list[dict]): Jobs of the tournament.
+        num_workers (int): Number of worker processes.
+        defined_rules (Optional[dict]): Defined rules dictionary, by default the rules
+            in the configs directory.
+        batch_size (int): Number of jobs sent to a worker at once.
+
+    Returns:
+        tuple[dict[int, dict], dict]: Results of the jobs by job id, and a report with
+            the number of workers, finished jobs, failed jobs, rounds, seconds and
+            rounds per second.
+
+    Raises:
+        RuntimeError: If all the workers exited before the jobs were finished.
+    """
+    coordinator = Coordinator(jobs, batch_size=batch_size)
+    host, port = coordinator.address
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(host, port, defined_rules))
+        for _ in range(num_workers)
+    ]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    try:
+        results = coordinator.run(
+            stop_when=lambda: not any(worker.is_alive() for worker in workers)
+        )
+    finally:
+        # Idle workers are told to stop, give all of them one timeout to exit
+        end = time.monotonic() + coordinator.timeout
+        for worker in workers:
+            worker.join(timeout=max(0.0, end - time.monotonic()))
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        coordinator.close()
+    seconds = time.perf_counter() - start
+
+    if not coordinator.finished():
+        raise RuntimeError("All the workers exited before the jobs were finished")
+
+    rounds = summarize(results)["rounds"]
+    report = {
+        "workers": num_workers,
+        "jobs": len(results),
+        "failed": len(coordinator.failed),
+        "rounds": rounds,
+        "seconds": seconds,
+        "rounds_per_second": rounds / seconds,
+    }
+    return results, report
+
+
+def benchmark(
+    jobs: list[dict],
+    worker_counts: list[int],
+    defined_rules: Optional[dict] = None,
+    batch_size: int = 1,
+) -> list[dict]:
+    """Measures the throughput of the same jobs for different numbers of workers.
+
+    Args:
+        jobs (list[dict]): Jobs of the tournament.
+        worker_counts (list[int]): Numbers of local worker processes to try.
+        defined_rules (Optional[dict]): Defined rules dictionary, by default the rules
+            in the configs directory.
+        batch_size (int): Number of jobs sent to a worker at once.
+
+    Returns:
+        list[dict]: Report of run_local for every number of workers.
+    """
+    return [
+        run_local(jobs, num_workers, defined_rules, batch_size)[1]
+        for num_workers in worker_counts
+    ]
+
+
+def main():
+    """Runs a coordinator, a worker or a local benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator")
+    coordinator_parser.add_argument("--host", default="0.0.0.0")
+    coordinator_parser.add_argument("--port", type=int, default=5555)
+    local_parser = subparsers.add_parser("local")
+    local_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    for subparser in (coordinator_parser, local_parser):
+        subparser.add_argument("--matches", type=int, default=100)
+        subparser.add_argument("--games-per-job", type=int, default=10)
+        subparser.add_argument("--batch-size", type=int, default=1)
+        subparser.add_argument("--seed", type=int, default=0)
+    worker_parser = subparsers.add_parser("worker")
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=5555)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(args.host, args.port)
+        return
+
+    jobs = make_jobs(
+        _load_yaml("game_config.yaml"), args.matches, args.games_per_job, args.seed
+    )
+    if args.command == "coordinator":
+        coordinator = Coordinator(
+            jobs, host=args.host, port=args.port, batch_size=args.batch_size
+        )
+        try:
+            results = coordinator.run()
+        finally:
+            coordinator.close()
+        print(summarize(results))
+        if coordinator.failed:
+            print(f"Failed jobs: {sorted(coordinator.failed)}")
+        return
+
+    for report in benchmark(jobs, args.workers, batch_size=args.batch_size):
+        print(
+            f"{report['workers']} workers: {report['rounds']} rounds in "
+            f"{report['seconds']:.2f}s ({report['rounds_per_second']:.0f} rounds/s, "
+            f"{report['failed']} failed jobs)"
+        )
+
+
+if __name__ == "__main__":
+    main()
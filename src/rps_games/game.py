@@ -2,12 +2,21 @@
 
 import logging
 import os
+import sys
+from fractions import Fraction
+from itertools import combinations
 from typing import Optional
 
 import emoji
 import yaml
 from dotenv import load_dotenv
 
+from rps_games.checkpoint import (
+    Checkpoint,
+    get_rng_state,
+    load_checkpoint,
+    set_rng_state,
+)
 from rps_games.configs.config import GameConfig, PlayerConfig, RulesConfig
 from rps_games.players import ComputerPlayer, HumanPlayer, LLMPlayer, Player
 
@@ -41,7 +50,46 @@ def init_player(player_config: PlayerConfig, rules: Optional[dict]) -> Player:
     elif player_config.type == "ComputerPlayer":
         return ComputerPlayer(name=player_config.name)
     elif player_config.type == "LLMPlayer":
-        return LLMPlayer(name=player_config.name, rules=rules)
+        fallback_weights = None
+        if player_config.fallback == "equilibrium":
+            fallback_weights = RuleSet(rules).equilibrium()
+        return LLMPlayer(
+            name=player_config.name,
+            rules=rules,
+            deadline=player_config.deadline,
+            fallback_weights=fallback_weights,
+        )
+
+
+def _solve_exactly(equations: list[list[int]], unknowns: int) -> Optional[list]:
+    """Solves a system of linear equations exactly with Gaussian elimination.
+
+    Args:
+        equations (list[list[int]]): Rows of coefficients followed by the constant term.
+        unknowns (int): Number of unknowns.
+
+    Returns:
+        Optional[list]: The unique solution as fractions, or None if the system has no
+            solution or more than one.
+    """
+    rows = [[Fraction(value) for value in equation] for equation in equations]
+    pivot_row = 0
+    for column in range(unknowns):
+        pivot = next(
+            (r for r in range(pivot_row, len(rows)) if rows[r][column] != 0), None
+        )
+        if pivot is None:
+            return None
+        rows[pivot_row], rows[pivot] = rows[pivot], rows[pivot_row]
+        rows[pivot_row] = [value / rows[pivot_row][column] for value in rows[pivot_row]]
+        for r, row in enumerate(rows):
+            if r != pivot_row and row[column] != 0:
+                factor = row[column]
+                rows[r] = [a - factor * b for a, b in zip(row, rows[pivot_row])]
+        pivot_row += 1
+    if any(row[-1] != 0 for row in rows[unknowns:]):
+        return None
+    return [rows[i][-1] for i in range(unknowns)]
 
 
 class RuleSet:
@@ -75,6 +123,63 @@ class RuleSet:
         """
         return list(self.rules.keys())
 
+    def payoff_table(self) -> list[list[int]]:
+        """Gets the payoff table of the rules, indexed like the list of choices.
+
+        Returns:
+            list[list[int]]: Square matrix where entry [i][j] is 1 if choice i beats
+                choice j, -1 if choice j beats choice i and 0 if it's a draw.
+
+        Example:
+            >>> rules = RuleSet(BASIC_RULES)
+            >>> rules.payoff_table()
+                [[0, 1, -1], [-1, 0, 1], [1, -1, 0]]
+        """
+        choices = self.get_choices()
+        index = {choice: i for i, choice in enumerate(choices)}
+        table = [[0] * len(choices) for _ in choices]
+        for choice, defeated in self.rules.items():
+            for defeated_choice in defeated:
+                table[index[choice]][index[defeated_choice]] = 1
+                table[index[defeated_choice]][index[choice]] = -1
+        return table
+
+    def equilibrium(self) -> dict[str, float]:
+        """Computes an equilibrium mix of choices.
+
+        Playing the choices with these probabilities cannot be exploited by the
+        opponent: no choice of the opponent wins more often than it loses. The game is
+        solved exactly by trying the supports of increasing size, so for balanced rules
+        like the basic rules the mix is uniform.
+
+        Returns:
+            dict[str, float]: Probability of every choice.
+
+        Example:
+            >>> rules = RuleSet(BASIC_RULES)
+            >>> rules.equilibrium()
+                {"Rock": 0.333..., "Paper": 0.333..., "Scissors": 0.333...}
+        """
+        choices = self.get_choices()
+        table = self.payoff_table()
+        for size in range(1, len(choices) + 1):
+            for support in combinations(range(len(choices)), size):
+                # Every choice in the support must draw on average against the mix
+                equations = [[table[i][j] for i in support] + [0] for j in support]
+                equations.append([1] * size + [1])
+                mix = _solve_exactly(equations, size)
+                if mix is None or min(mix) < 0:
+                    continue
+                if all(
+                    sum(p * table[i][j] for p, i in zip(mix, support)) >= 0
+                    for j in range(len(choices))
+                ):
+                    probabilities = dict.fromkeys(choices, 0.0)
+                    for p, i in zip(mix, support):
+                        probabilities[choices[i]] = float(p)
+                    return probabilities
+        raise ValueError("The rules have no equilibrium")
+
     def determine_winner(
         self, choice_a: str, choice_b: str
     ) -> Optional[tuple[str, str]]:
@@ -110,27 +215,44 @@ class Game:
         player_b (Player): Second player.
         rule_set (RuleSet): RuleSet object containing the game rules.
         history (list[str]): List to store the history of the game.
+        rounds (list[dict]): Structured history with the choices and winner of each round.
+        round_num (int): Number of rounds played so far.
+        checkpoint (Optional[Checkpoint]): Checkpoint to save the game state to.
 
     Methods:
         log_and_print: Logs and prints a message.
+        get_state: Gets the state of the game.
+        restore: Restores the game from a loaded checkpoint.
         play_best_of: Plays a game with the best of a specified number of rounds.
         play_first_to: Plays a game where the first player to reach a specified score wins.
         _play_round: Plays a single round of the game.
+        _end_round: Saves the game state after a completed round.
         _get_game_winner: Gets the winner of the game.
     """
 
-    def __init__(self, player_a: Player, player_b: Player, rule_set: RuleSet):
+    def __init__(
+        self,
+        player_a: Player,
+        player_b: Player,
+        rule_set: RuleSet,
+        checkpoint: Optional[Checkpoint] = None,
+    ):
         """Initializes the Game with the given players and rules.
 
         Args:
             player_a (Player): First player.
             player_b (Player): Second player.
             rule_set (RuleSet): RuleSet object containing the game rules.
+            checkpoint (Optional[Checkpoint]): Checkpoint to save the game state to.
         """
         self.player_a = player_a
         self.player_b = player_b
         self.rule_set = rule_set
         self.history = []
+        self.rounds = []
+        self.round_num = 0
+        self.checkpoint = checkpoint
+        self._resumed = False
 
     def log_and_print(self, message: str):
         """Logs and prints a message.
@@ -142,6 +264,38 @@ class Game:
         logging.info(message)
         print(message)
 
+    def get_state(self) -> dict:
+        """Gets the state of the game.
+
+        Returns:
+            dict: JSON serializable state with the number of rounds played, the state of
+                the random number generator and the state of both players.
+        """
+        return {
+            "round_num": self.round_num,
+            "rng": get_rng_state(),
+            "player_a": self.player_a.get_state(),
+            "player_b": self.player_b.get_state(),
+        }
+
+    def restore(self, checkpoint: dict):
+        """Restores the game from a loaded checkpoint.
+
+        Args:
+            checkpoint (dict): Checkpoint as returned by load_checkpoint.
+        """
+        self.history = list(checkpoint["history"])
+        self.rounds = list(checkpoint["rounds"])
+        self._resumed = True
+        state = checkpoint["state"]
+        if state is not None:
+            self.round_num = state["round_num"]
+            set_rng_state(state["rng"])
+            self.player_a.set_state(state["player_a"])
+            self.player_b.set_state(state["player_b"])
+        if self.checkpoint is not None:
+            self.checkpoint.mark(self)
+
     def play_best_of(self, rounds: int = 3) -> Optional[Player]:
         """Plays a game with the best of a specified number of rounds.
 
@@ -151,10 +305,18 @@ class Game:
         Returns:
             Optional[Player]: The player who wins the most rounds, or None if it's a draw.
         """
-        self.log_and_print(f"\nBest of {rounds} rounds")
-        for round_num in range(rounds):
-            self.log_and_print(f"\n---------\nRound {round_num+1}\n---------")
-            self._play_round()
+        if self.checkpoint is not None:
+            self.checkpoint.start("best_of", rounds, resume=self._resumed)
+        if not self.history:
+            self.log_and_print(f"\nBest of {rounds} rounds")
+        try:
+            for round_num in range(self.round_num, rounds):
+                self.log_and_print(f"\n---------\nRound {round_num+1}\n---------")
+                self._play_round()
+                self._end_round()
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
 
         if self.player_a.score == self.player_b.score:
             return None
@@ -170,12 +332,18 @@ class Game:
         Returns:
             Player: The player who reaches the score first.
         """
-        self.log_and_print(f"\nFirst to {score} wins")
-        round_num = 0
-        while self.player_a.score < score and self.player_b.score < score:
-            self.log_and_print(f"\n--------\nRound {round_num+1}\n--------")
-            self._play_round()
-            round_num += 1
+        if self.checkpoint is not None:
+            self.checkpoint.start("first_to", score, resume=self._resumed)
+        if not self.history:
+            self.log_and_print(f"\nFirst to {score} wins")
+        try:
+            while self.player_a.score < score and self.player_b.score < score:
+                self.log_and_print(f"\n--------\nRound {self.round_num+1}\n--------")
+                self._play_round()
+                self._end_round()
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.flush()
 
         return self._get_game_winner()
 
@@ -191,6 +359,9 @@ class Game:
         result = self.rule_set.determine_winner(choice_a, choice_b)
 
         if result is None:
+            self.rounds.append(
+                {"choice_a": choice_a, "choice_b": choice_b, "winner": None}
+            )
             self.log_and_print("Draw")
             return
 
@@ -198,6 +369,13 @@ class Game:
 
         round_winner = self.player_a if winning_choice == choice_a else self.player_b
         round_winner.score += 1
+        self.rounds.append(
+            {
+                "choice_a": choice_a,
+                "choice_b": choice_b,
+                "winner": "a" if round_winner is self.player_a else "b",
+            }
+        )
 
         self.log_and_print(
             f"{winning_choice} {reason} {choice_b if winning_choice == choice_a else choice_a}"
@@ -211,6 +389,12 @@ class Game:
 
         return
 
+    def _end_round(self):
+        """Saves the game state after a completed round."""
+        self.round_num += 1
+        if self.checkpoint is not None:
+            self.checkpoint.record(self)
+
     def _get_game_winner(self) -> Player:
         """Gets the winner of the game.
 
@@ -224,15 +408,46 @@ class Game:
         )
 
 
-def main(config: dict, defined_rules: dict):
+def _load_resumable_checkpoint(game_config: GameConfig) -> dict:
+    """Loads the checkpoint of a game and checks that it matches the configuration.
+
+    Args:
+        game_config (GameConfig): Game configuration.
+
+    Returns:
+        dict: Loaded checkpoint.
+
+    Raises:
+        ValueError: If there is no checkpoint or it was saved for a different game.
+    """
+    if game_config.checkpoint_path is None:
+        raise ValueError("A checkpoint_path is required to resume a game")
+
+    checkpoint = load_checkpoint(game_config.checkpoint_path)
+    if checkpoint is None:
+        raise ValueError(f"No checkpoint found at {game_config.checkpoint_path}")
+
+    target = (
+        game_config.target_score
+        if game_config.mode == "first_to"
+        else game_config.rounds
+    )
+    if checkpoint["mode"] != game_config.mode or checkpoint["target"] != target:
+        raise ValueError("The checkpoint was saved for a different game configuration")
+    return checkpoint
+
+
+def main(config: dict, defined_rules: dict, resume: bool = False):
     """Main function to play the game based on the configuration.
 
     Args:
         config (dict): Game configuration dictionary.
         defined_rules (dict): Defined rules dictionary.
+        resume (bool): Whether to continue the game saved in the checkpoint file.
 
     Raises:
-        ValueError: If the game mode is invalid.
+        ValueError: If the game mode is invalid, or if the game cannot be resumed.
+        FileExistsError: If the checkpoint file exists but the game is not resumed.
     """
     # Validate the configuration using the GameConfig model
     game_config = GameConfig(**config["game"])
@@ -248,8 +463,17 @@ def main(config: dict, defined_rules: dict):
     player_one = init_player(player_one_config, chosen_rule_set)
     player_two = init_player(player_two_config, chosen_rule_set)
 
-    # Initialize the game with the players and rules
-    game = Game(player_one, player_two, game_rules)
+    # Initialize the game with the players, rules and optional checkpoint
+    checkpoint = None
+    if game_config.checkpoint_path is not None:
+        checkpoint = Checkpoint(
+            game_config.checkpoint_path, every=game_config.checkpoint_every
+        )
+    game = Game(player_one, player_two, game_rules, checkpoint=checkpoint)
+
+    # Restore the game state from the checkpoint file
+    if resume:
+        game.restore(_load_resumable_checkpoint(game_config))
 
     # Play the game based on the mode specified in the configuration
     if game_config.mode == "first_to":
@@ -259,6 +483,11 @@ def main(config: dict, defined_rules: dict):
     else:
         raise ValueError("Invalid game mode. Must be 'first_to' or 'best_of'")
 
+    # Log the latency statistics of the LLM players
+    for player in (player_one, player_two):
+        if isinstance(player, LLMPlayer):
+            logging.info("%s latency report: %s", player, player.latency_report())
+
     # Log and print the game over message
     print("\nGame Over")
 
@@ -287,4 +516,4 @@ if __name__ == "__main__":
     with open(rules_file_path, "r", encoding="utf-8") as file:
         rules_dict = yaml.safe_load(file)
 
-    main(config=config_dict, defined_rules=rules_dict)
+    main(config=config_dict, defined_rules=rules_dict, resume="--resume" in sys.argv)
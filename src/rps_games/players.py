@@ -1,15 +1,24 @@
 """Players module."""
 
 import getpass
+import logging
 import random
 import sys
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import TYPE_CHECKING, Optional, Sequence
 
 from google.api_core.exceptions import ResourceExhausted
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class Player(ABC):
     """Abstract Player class.
@@ -20,6 +29,9 @@ class Player(ABC):
 
     Methods:
         choice: Abstract method to get the player's choice.
+        choices_batch: Gets the player's choices for many independent games at once.
+        get_state: Gets the internal state of the player.
+        set_state: Restores the internal state of the player.
         __str__: String representation of the player.
     """
 
@@ -44,6 +56,55 @@ class Player(ABC):
             str: Chosen option.
         """
 
+    def choices_batch(
+        self,
+        choices: list[str],
+        size: int,
+        rng: "np.random.Generator",
+        history: Optional[list] = None,
+    ) -> Sequence[int]:
+        """Gets the player's choices for many independent games at once.
+
+        The default implementation calls choice once per game, so it is only as fast as
+        choice. Players whose strategy can be vectorized should override it.
+
+        Args:
+            choices (list[str]): List of possible choices.
+            size (int): Number of games to choose for.
+            rng (np.random.Generator): Random number generator for the choices.
+            history (Optional[list]): List of previous choices made in the game.
+
+        Returns:
+            Sequence[int]: Indices into choices of the chosen options, one per game.
+
+        Raises:
+            ValueError: If choice returns an option that is not one of the choices.
+        """
+        index = {choice: i for i, choice in enumerate(choices)}
+        batch = []
+        for _ in range(size):
+            choice = self.choice(choices, history or [])
+            if choice not in index:
+                raise ValueError(f"{self} chose {choice!r}, expected one of {choices}")
+            batch.append(index[choice])
+        return batch
+
+    def get_state(self) -> dict:
+        """Gets the internal state of the player.
+
+        Returns:
+            dict: JSON serializable state of the player.
+        """
+        return {"score": self.score}
+
+    def set_state(self, state: dict):
+        """Restores the internal state of the player.
+
+        Args:
+            state (dict): State of the player as returned by get_state.
+        """
+        self.score = state["score"]
+
     def __str__(self) -> str:
         """String representation of the player.
 
@@ -96,6 +157,7 @@ class ComputerPlayer(Player):
 
     Methods:
         choice: Gets the computer player's choice randomly.
+        choices_batch: Gets the computer player's choices for many games randomly.
         __str__: String representation of the player.
     """
 
@@ -111,6 +173,26 @@ class ComputerPlayer(Player):
         """
         return random.choice(choices)
 
+    def choices_batch(
+        self,
+        choices: list[str],
+        size: int,
+        rng: "np.random.Generator",
+        history: Optional[list] = None,
+    ) -> Sequence[int]:
+        """Gets the computer player's choices for many independent games randomly.
+
+        Args:
+            choices (list[str]): List of possible choices.
+            size (int): Number of games to choose for.
+            rng (np.random.Generator): Random number generator for the choices.
+            history (Optional[list]): List of previous choices made in the game.
+
+        Returns:
+            Sequence[int]: Indices into choices of the chosen options, one per game.
+        """
+        return rng.integers(len(choices), size=size)
+
 
 class LLMPlayer(Player):
     """LLM Player class.
@@ -118,25 +200,97 @@ class LLMPlayer(Player):
     Attributes:
         name (str): Name of the player.
         score (int): Score of the player.
-        model (ChatGoogleGenerativeAI): Language model for generating choices.
+        model (BaseChatModel): Language model for generating choices.
         rules (dict[str, dict[str, str]]): Rules of the game.
+        deadline (Optional[float]): Seconds to wait for the model before falling back.
+        hedge_quantile (Optional[float]): Quantile of the recent latencies after which a
+            duplicate request is sent to the model.
+        fallback_weights (Optional[dict[str, float]]): Weights of the choices used when
+            the deadline passes, or None to choose uniformly at random.
+        warmup (int): Number of latencies needed before hedging starts.
+        latency_key (str): Key of the recent latencies shared by the players of a
+            model.
+        stats (dict[str, float]): Number of moves, hedged requests, hedged requests that
+            answered first, fallbacks and the seconds saved by hedging.
 
     Methods:
         choice: Gets the LLM player's choice based on a generated prompt.
+        latency_report: Gets the hedging statistics of the player.
         _generate_prompt: Generates a prompt for the LLM with the current choices and game history.
+        _submit: Sends a request to the model in a daemon thread.
+        _run_request: Invokes the model and records how long it took.
+        _miss_deadline: Records a move whose requests missed the deadline.
+        _add_saved: Adds the latency saved by a hedged request that answered first.
+        _hedge_after: Gets the latency after which a duplicate request is sent.
+        _fallback_choice: Gets a choice without the model.
         __str__: String representation of the player.
     """
 
-    def __init__(self, name: str, rules: dict[str, dict[str, str]]):
+    # Number of recent latencies the hedging threshold is computed from
+    LATENCY_WINDOW = 100
+    # Recent latencies by model, shared by all the players of a model because a new
+    # player is created for every game
+    _latency_windows = {}
+    _latency_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name: str,
+        rules: dict[str, dict[str, str]],
+        model: Optional[BaseChatModel] = None,
+        deadline: Optional[float] = None,
+        hedge_quantile: Optional[float] = 0.95,
+        fallback_weights: Optional[dict[str, float]] = None,
+        warmup: int = 5,
+        max_outstanding: int = 4,
+        latency_key: Optional[str] = None,
+    ):
         """Initializes the LLM player with a name, rules, and a language model.
 
         Args:
             name (str): Name of the player.
             rules (dict[str, dict[str, str]]): Rules of the game.
+            model (Optional[BaseChatModel]): Language model for generating
+                choices, by default Gemini 1.5 Flash.
+            deadline (Optional[float]): Seconds to wait for the model before falling
+                back, or None to wait indefinitely.
+            hedge_quantile (Optional[float]): Quantile of the recent latencies after
+                which a duplicate request is sent to the model, or None to never hedge.
+            fallback_weights (Optional[dict[str, float]]): Weights of the choices used
+                when the deadline passes, or None to choose uniformly at random.
+            warmup (int): Number of latencies needed before hedging starts.
+            max_outstanding (int): Maximum number of requests of the player that may
+                be running at once, including requests abandoned at the deadline.
+            latency_key (Optional[str]): Key of the recent latencies shared by the
+                players of a model, by default the name of the model.
         """
         super().__init__(name)
-        self.model = ChatGoogleGenerativeAI(model="models/gemini-1.5-flash")
+        if model is None:
+            model = ChatGoogleGenerativeAI(model="models/gemini-1.5-flash")
+        self.model = model
         self.rules = rules
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.fallback_weights = fallback_weights
+        self.warmup = warmup
+        self.stats = {
+            "moves": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "fallbacks": 0,
+            "saved_latency": 0.0,
+        }
+        if latency_key is None:
+            latency_key = str(getattr(model, "model", None) or type(model).__name__)
+        self.latency_key = latency_key
+        with self._latency_lock:
+            self._latencies = self._latency_windows.setdefault(
+                latency_key, deque(maxlen=self.LATENCY_WINDOW)
+            )
+        self._abandoned = set()
+        # Requests run in daemon threads, so a hanging model cannot keep the process
+        # alive once the game is over
+        self._outstanding = threading.BoundedSemaphore(max_outstanding)
 
     def _generate_prompt(self, choices: list[str], history: list) -> PromptTemplate:
         """Generates a prompt for the LLM with the current choices and game history.
@@ -188,9 +342,174 @@ class LLMPlayer(Player):
             str: Chosen option.
         """
         prompt = self._generate_prompt(choices, history)
+        start = time.perf_counter()
+        deadline = None if self.deadline is None else start + self.deadline
+        hedge_after = self._hedge_after()
+        self.stats["moves"] += 1
+
+        primary = self._submit(prompt, deadline=deadline)
+        if primary is None:
+            # No request was sent, so there is no latency to record
+            return self._fallback_choice(choices)
+        pending = {primary}
+        hedge = None
+        while True:
+            timeouts = [] if deadline is None else [deadline]
+            if hedge is None and hedge_after is not None:
+                timeouts.append(start + hedge_after)
+            timeout = None
+            if timeouts:
+                timeout = max(min(timeouts) - time.perf_counter(), 0)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if done:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                self._miss_deadline(pending)
+                return self._fallback_choice(choices)
+            if hedge is None and hedge_after is not None:
+                hedge = self._submit(prompt, blocking=False)
+                if hedge is None:
+                    # Too many requests are running, wait for the current one
+                    hedge_after = None
+                    continue
+                pending.add(hedge)
+                self.stats["hedges"] += 1
+
+        winner = done.pop()
         try:
-            res = self.model.invoke(prompt)
+            res, _ = winner.result()
         except ResourceExhausted:
             print("LLM resource exhausted. Please try again.")
             sys.exit()
+        if winner is hedge:
+            self.stats["hedge_wins"] += 1
+            waited = time.perf_counter() - start
+            primary.add_done_callback(lambda future: self._add_saved(future, waited))
         return res.content
+
+    def _submit(
+        self, prompt: str, blocking: bool = True, deadline: Optional[float] = None
+    ) -> Optional[Future]:
+        """Sends a request to the model in a daemon thread.
+
+        Args:
+            prompt (str): Prompt for the model.
+            blocking (bool): Whether to wait for a running request to finish if there
+                are already max_outstanding requests.
+            deadline (Optional[float]): Time until which to wait, or None to wait
+                indefinitely.
+
+        Returns:
+            Optional[Future]: Future with the response of the model and its latency in
+                seconds, or None if too many requests are running.
+        """
+        if not blocking:
+            acquired = self._outstanding.acquire(blocking=False)
+        elif deadline is None:
+            acquired = self._outstanding.acquire()
+        else:
+            timeout = max(deadline - time.perf_counter(), 0)
+            acquired = self._outstanding.acquire(timeout=timeout)
+        if not acquired:
+            return None
+        future = Future()
+        threading.Thread(
+            target=self._run_request, args=(future, prompt), daemon=True
+        ).start()
+        return future
+
+    def _run_request(self, future: Future, prompt: str):
+        """Invokes the model and records how long it took.
+
+        The latency of every request is recorded, including requests that lost
+        against a duplicate, except requests already recorded as missing the deadline.
+
+        Args:
+            future (Future): Future to set the response and latency on.
+            prompt (str): Prompt for the model.
+        """
+        start = time.perf_counter()
+        try:
+            res = self.model.invoke(prompt)
+        except Exception as error:
+            self._outstanding.release()
+            future.set_exception(error)
+            return
+        latency = time.perf_counter() - start
+        with self._latency_lock:
+            if future in self._abandoned:
+                self._abandoned.discard(future)
+            else:
+                self._latencies.append(latency)
+        self._outstanding.release()
+        future.set_result((res, latency))
+
+    def _miss_deadline(self, pending: set):
+        """Records a move whose requests missed the deadline.
+
+        The move counts as a latency of the deadline, and the late requests are not
+        recorded again when they finish.
+
+        Args:
+            pending (set): The requests of the move that are still running.
+        """
+        with self._latency_lock:
+            self._abandoned.update(pending)
+            self._latencies.append(self.deadline)
+
+    def _add_saved(self, primary: Future, waited: float):
+        """Adds the latency saved by a hedged request that answered first.
+
+        Args:
+            primary (Future): The first request of the move, now finished.
+            waited (float): Seconds the move took thanks to the hedged request.
+        """
+        if primary.exception() is not None:
+            return
+        _, latency = primary.result()
+        with self._latency_lock:
+            self.stats["saved_latency"] += max(latency - waited, 0.0)
+
+    def _hedge_after(self) -> Optional[float]:
+        """Gets the latency after which a duplicate request is sent.
+
+        Returns:
+            Optional[float]: The configured quantile of the recent latencies, or None if
+                hedging is disabled or there are not enough latencies yet.
+        """
+        with self._latency_lock:
+            latencies = sorted(self._latencies)
+        if self.hedge_quantile is None or len(latencies) < self.warmup:
+            return None
+        return latencies[int(self.hedge_quantile * (len(latencies) - 1))]
+
+    def _fallback_choice(self, choices: list[str]) -> str:
+        """Gets a choice without the model, used when the deadline passes.
+
+        Args:
+            choices (list[str]): List of possible choices.
+
+        Returns:
+            str: Chosen option.
+        """
+        self.stats["fallbacks"] += 1
+        logging.warning("%s missed the deadline, using the fallback strategy", self)
+        if self.fallback_weights is None:
+            return random.choice(choices)
+        weights = [self.fallback_weights.get(choice, 0.0) for choice in choices]
+        return random.choices(choices, weights=weights)[0]
+
+    def latency_report(self) -> dict[str, float]:
+        """Gets the hedging statistics of the player.
+
+        Returns:
+            dict[str, float]: The stats, the rate of hedged and fallback moves and the
+                current hedging threshold.
+        """
+        with self._latency_lock:
+            report = dict(self.stats)
+        moves = max(report["moves"], 1)
+        report["hedge_rate"] = report["hedges"] / moves
+        report["fallback_rate"] = report["fallbacks"] / moves
+        report["hedge_after"] = self._hedge_after()
+        return report
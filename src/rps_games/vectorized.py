@@ -0,0 +1,157 @@
+"""Vectorized engine to play many independent games in lockstep."""
+
+import random
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from rps_games.game import RuleSet
+from rps_games.players import Player
+
+
+class VectorizedGame:
+    """VectorizedGame class to play many independent games at once.
+
+    All games are advanced together: in every step the players choose for all the
+    games that are not over yet with choices_batch, and the rounds are resolved with a
+    single lookup in the payoff table of the rules. Players that do not override
+    choices_batch are asked once per game, which is no faster than playing the games
+    one by one.
+
+    Attributes:
+        player_a (Player): Strategy of the first player in every game.
+        player_b (Player): Strategy of the second player in every game.
+        rule_set (RuleSet): RuleSet object containing the game rules.
+        num_games (int): Number of independent games.
+        rng (Optional[np.random.Generator]): Random number generator of the players.
+        moves_a (np.ndarray): Choice indices of the first player in the last round, or
+            -1 for the games that were already over.
+        moves_b (np.ndarray): Choice indices of the second player in the last round, or
+            -1 for the games that were already over.
+        scores_a (np.ndarray): Score of the first player in every game.
+        scores_b (np.ndarray): Score of the second player in every game.
+        rounds (np.ndarray): Number of rounds played in every game.
+        done (np.ndarray): Whether every game is over.
+
+    Methods:
+        play: Plays all the games until they are over.
+        step: Plays a single round of all the games that are not over.
+        winners: Gets the winner of every game.
+    """
+
+    def __init__(
+        self,
+        player_a: Player,
+        player_b: Player,
+        rule_set: RuleSet,
+        num_games: int,
+        rng: Optional[np.random.Generator] = None,
+    ):
+        """Initializes the VectorizedGame with the given players, rules and size.
+
+        Args:
+            player_a (Player): Strategy of the first player in every game.
+            player_b (Player): Strategy of the second player in every game.
+            rule_set (RuleSet): RuleSet object containing the game rules.
+            num_games (int): Number of independent games.
+            rng (Optional[np.random.Generator]): Random number generator of the
+                players. By default a new one is seeded from the random module whenever
+                play is called, so random.seed makes the games reproducible.
+        """
+        self.player_a = player_a
+        self.player_b = player_b
+        self.rule_set = rule_set
+        self.num_games = num_games
+        self.rng = rng
+        self._rng = rng
+        self._choices = rule_set.get_choices()
+        self._payoff = np.asarray(rule_set.payoff_table(), dtype=np.int8)
+        self._first_to = np.zeros(num_games, dtype=bool)
+        self._target = np.zeros(num_games, dtype=np.int64)
+        self._reset()
+
+    def _reset(self):
+        """Resets the moves, scores and rounds of all the games."""
+        self.moves_a = np.full(self.num_games, -1, dtype=np.intp)
+        self.moves_b = np.full(self.num_games, -1, dtype=np.intp)
+        self.scores_a = np.zeros(self.num_games, dtype=np.int64)
+        self.scores_b = np.zeros(self.num_games, dtype=np.int64)
+        self.rounds = np.zeros(self.num_games, dtype=np.int64)
+        self.done = np.zeros(self.num_games, dtype=bool)
+
+    def play(
+        self,
+        mode: Union[str, Sequence[str]] = "best_of",
+        target: Union[int, Sequence[int]] = 3,
+    ) -> np.ndarray:
+        """Plays all the games until they are over.
+
+        Args:
+            mode (Union[str, Sequence[str]]): The game mode (first_to or best_of), either
+                for all the games or for every single game.
+            target (Union[int, Sequence[int]]): The target score for first_to games or
+                the number of rounds for best_of games, either for all the games or for
+                every single game.
+
+        Returns:
+            np.ndarray: The winner of every game, see winners.
+
+        Raises:
+            ValueError: If a game mode is invalid.
+        """
+        modes = np.broadcast_to(np.asarray(mode), (self.num_games,))
+        if not np.isin(modes, ["first_to", "best_of"]).all():
+            raise ValueError("Invalid game mode. Must be 'first_to' or 'best_of'")
+        self._first_to = modes == "first_to"
+        self._target = np.broadcast_to(
+            np.asarray(target, dtype=np.int64), (self.num_games,)
+        ).copy()
+
+        self._rng = self.rng
+        self._reset()
+        self._update_done()
+        while not self.done.all():
+            self.step()
+
+        return self.winners()
+
+    def step(self):
+        """Plays a single round of all the games that are not over."""
+        if self._rng is None:
+            self._rng = np.random.default_rng(random.getrandbits(64))
+        active = np.flatnonzero(~self.done)
+        moves_a = np.asarray(
+            self.player_a.choices_batch(self._choices, active.size, self._rng),
+            dtype=np.intp,
+        )
+        moves_b = np.asarray(
+            self.player_b.choices_batch(self._choices, active.size, self._rng),
+            dtype=np.intp,
+        )
+        outcome = self._payoff[moves_a, moves_b]
+
+        self.moves_a.fill(-1)
+        self.moves_b.fill(-1)
+        self.moves_a[active] = moves_a
+        self.moves_b[active] = moves_b
+        self.scores_a[active] += outcome > 0
+        self.scores_b[active] += outcome < 0
+        self.rounds[active] += 1
+        self._update_done()
+
+    def _update_done(self):
+        """Updates which games are over according to their mode and target."""
+        self.done = np.where(
+            self._first_to,
+            np.maximum(self.scores_a, self.scores_b) >= self._target,
+            self.rounds >= self._target,
+        )
+
+    def winners(self) -> np.ndarray:
+        """Gets the winner of every game.
+
+        Returns:
+            np.ndarray: 1 if the first player has the highest score, -1 if the second
+                player has the highest score and 0 if it's a draw.
+        """
+        return np.sign(self.scores_a - self.scores_b).astype(np.int8)
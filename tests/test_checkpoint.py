@@ -0,0 +1,198 @@
+"""Tests for the checkpoint module."""
+
+import random
+
+import pytest
+
+from rps_games.checkpoint import Checkpoint, load_checkpoint
+from rps_games.game import Game, RuleSet, main
+from rps_games.players import ComputerPlayer
+
+
+@pytest.fixture
+def rule_set():
+    """Fixture for creating a RuleSet instance with the basic rules."""
+    return RuleSet(
+        {
+            "Rock": {"Scissors": "crushes"},
+            "Scissors": {"Paper": "cuts"},
+            "Paper": {"Rock": "covers"},
+        }
+    )
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    """Fixture for the path of a checkpoint file."""
+    return str(tmp_path / "checkpoint.jsonl")
+
+
+def quit_after(player, rounds):
+    """Makes a player quit the game after a number of rounds."""
+    original_choice = player.choice
+    calls = {"count": 0}
+
+    def choice(choices, history=None):
+        if calls["count"] == rounds:
+            raise SystemExit
+        calls["count"] += 1
+        return original_choice(choices, history)
+
+    player.choice = choice
+
+
+def test_checkpoint_invalid_frequency(checkpoint_path):
+    """Test that a checkpoint frequency lower than 1 is rejected."""
+    with pytest.raises(ValueError):
+        Checkpoint(checkpoint_path, every=0)
+
+
+def test_checkpoint_is_append_only(rule_set, checkpoint_path):
+    """Test that each write appends one line with the buffered rounds."""
+    game = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path, every=2),
+    )
+    game.play_best_of(rounds=5)
+
+    with open(checkpoint_path, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert len(lines) == 1 + 3
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    assert checkpoint["mode"] == "best_of"
+    assert checkpoint["target"] == 5
+    assert len(checkpoint["rounds"]) == 5
+    assert checkpoint["history"] == game.history
+    assert checkpoint["state"]["player_a"]["score"] == game.player_a.score
+    assert checkpoint["state"]["player_b"]["score"] == game.player_b.score
+
+
+def test_load_checkpoint_missing(checkpoint_path):
+    """Test loading a checkpoint that does not exist."""
+    assert load_checkpoint(checkpoint_path) is None
+
+
+@pytest.mark.parametrize("content", ["", '{"mode": "best'])
+def test_load_checkpoint_without_header(checkpoint_path, content):
+    """Test that a checkpoint whose header was not fully written is rejected."""
+    with open(checkpoint_path, "w", encoding="utf-8") as file:
+        file.write(content)
+    with pytest.raises(ValueError):
+        load_checkpoint(checkpoint_path)
+
+
+def test_checkpoint_not_overwritten(rule_set, checkpoint_path):
+    """Test that a new game refuses to overwrite an existing checkpoint."""
+    Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path),
+    ).play_best_of(rounds=3)
+
+    game = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path),
+    )
+    with pytest.raises(FileExistsError):
+        game.play_best_of(rounds=3)
+    assert len(load_checkpoint(checkpoint_path)["rounds"]) == 3
+
+
+def test_load_checkpoint_truncated(rule_set, checkpoint_path):
+    """Test that a partially written last line is ignored."""
+    game = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path),
+    )
+    game.play_best_of(rounds=3)
+    with open(checkpoint_path, "a", encoding="utf-8") as file:
+        file.write('{"history": ["Round')
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    assert len(checkpoint["rounds"]) == 3
+    assert checkpoint["state"]["round_num"] == 3
+
+    game = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path),
+    )
+    game.restore(checkpoint)
+    game.play_best_of(rounds=5)
+    assert len(load_checkpoint(checkpoint_path)["rounds"]) == 5
+
+
+@pytest.mark.parametrize("mode, target", [("best_of", 8), ("first_to", 4)])
+def test_resume_continues_where_stopped(rule_set, checkpoint_path, mode, target):
+    """Test that a resumed game ends exactly like an uninterrupted one."""
+    random.seed(42)
+    reference = Game(ComputerPlayer("Alice"), ComputerPlayer("Bob"), rule_set)
+    getattr(reference, f"play_{mode}")(target)
+
+    random.seed(42)
+    interrupted = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path, every=3),
+    )
+    quit_after(interrupted.player_b, 2)
+    with pytest.raises(SystemExit):
+        getattr(interrupted, f"play_{mode}")(target)
+
+    random.seed(0)
+    resumed = Game(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        checkpoint=Checkpoint(checkpoint_path, every=3),
+    )
+    resumed.restore(load_checkpoint(checkpoint_path))
+    assert resumed.round_num == 2
+    getattr(resumed, f"play_{mode}")(target)
+
+    assert resumed.rounds == reference.rounds
+    assert resumed.history == reference.history
+    assert resumed.player_a.score == reference.player_a.score
+    assert resumed.player_b.score == reference.player_b.score
+    assert load_checkpoint(checkpoint_path)["rounds"] == reference.rounds
+
+
+def test_main_resume_without_checkpoint(checkpoint_path):
+    """Test that resuming fails if there is no checkpoint."""
+    config = {
+        "game": {
+            "mode": "best_of",
+            "rounds": 3,
+            "rules": "BASIC_RULES",
+            "target_score": 3,
+            "checkpoint_path": checkpoint_path,
+        },
+        "players": {
+            "player_one": {"type": "ComputerPlayer", "name": "Alice"},
+            "player_two": {"type": "ComputerPlayer", "name": "Bob"},
+        },
+    }
+    defined_rules = {
+        "BASIC_RULES": {
+            "Rock": {"Scissors": "crushes"},
+            "Scissors": {"Paper": "cuts"},
+            "Paper": {"Rock": "covers"},
+        }
+    }
+    with pytest.raises(ValueError):
+        main(config, defined_rules, resume=True)
+
+    main(config, defined_rules)
+    config["game"]["rounds"] = 5
+    with pytest.raises(ValueError):
+        main(config, defined_rules, resume=True)
@@ -0,0 +1,293 @@
+"""Tests for the distributed module."""
+
+import logging
+import multiprocessing
+import socket
+import threading
+import time
+
+import pytest
+
+from rps_games import distributed
+from rps_games.distributed import (
+    Coordinator,
+    _receive,
+    _send,
+    make_jobs,
+    run_job,
+    run_local,
+    run_worker,
+    summarize,
+)
+
+
+@pytest.fixture
+def defined_rules():
+    """Fixture for defined rules."""
+    return {
+        "BASIC_RULES": {
+            "Rock": {"Scissors": "crushes"},
+            "Scissors": {"Paper": "cuts"},
+            "Paper": {"Rock": "covers"},
+        }
+    }
+
+
+@pytest.fixture
+def jobs():
+    """Fixture for the jobs of a tournament between two computer players."""
+    config = {
+        "game": {
+            "mode": "first_to",
+            "rounds": 3,
+            "rules": "BASIC_RULES",
+            "target_score": 3,
+        },
+        "players": {
+            "player_one": {"type": "ComputerPlayer", "name": "Alice"},
+            "player_two": {"type": "ComputerPlayer", "name": "Bob"},
+        },
+    }
+    return make_jobs(config, matches=12, games_per_job=5, seed=7)
+
+
+def test_make_jobs(jobs):
+    """Test that the jobs carry everything needed to play them."""
+    assert [job["job_id"] for job in jobs] == list(range(12))
+    assert [job["seed"] for job in jobs] == list(range(7, 19))
+    assert jobs[0]["mode"] == "first_to"
+    assert jobs[0]["target"] == 3
+    assert jobs[0]["player_a"] == {
+        "type": "ComputerPlayer",
+        "name": "Alice",
+        "deadline": None,
+        "fallback": "random",
+    }
+
+
+def test_make_jobs_rejects_human_player():
+    """Test that human players cannot be sent to remote workers."""
+    config = {
+        "game": {
+            "mode": "best_of",
+            "rounds": 3,
+            "rules": "BASIC_RULES",
+            "target_score": 3,
+        },
+        "players": {
+            "player_one": {"type": "HumanPlayer", "name": "Alice"},
+            "player_two": {"type": "ComputerPlayer", "name": "Bob"},
+        },
+    }
+    with pytest.raises(ValueError):
+        make_jobs(config, matches=1)
+
+
+def take_jobs_and_fail(address, message=None):
+    """Acts as a worker that takes jobs and fails before sending their results."""
+    with socket.create_connection(address) as conn:
+        with conn.makefile("rwb") as file:
+            _send(file, {"type": "request", "results": []})
+            jobs = _receive(file)["jobs"]
+            if message is not None:
+                _send(file, message)
+                assert _receive(file) is None
+    return jobs
+
+
+def test_run_job_is_deterministic(jobs, defined_rules):
+    """Test that a job played twice gives the same result."""
+    result = run_job(jobs[0], defined_rules)
+    assert result == run_job(jobs[0], defined_rules)
+    assert result["wins_a"] + result["wins_b"] + result["draws"] == 5
+    assert result["rounds"] >= 15
+
+
+def test_merge_is_idempotent(jobs):
+    """Test that a result reported twice is only merged once."""
+    coordinator = Coordinator(jobs[:2])
+    result = {"job_id": 0, "wins_a": 1, "wins_b": 0, "draws": 0, "rounds": 3}
+    coordinator.merge(0, [result])
+    coordinator.merge(1, [dict(result, wins_a=0, wins_b=1)])
+    coordinator.close()
+    assert coordinator.results == {0: result}
+
+
+def test_work_stealing(jobs):
+    """Test that idle workers steal half of the largest queue."""
+    coordinator = Coordinator(jobs, batch_size=1)
+    first = coordinator._register()
+    second = coordinator._register()
+
+    assert len(coordinator._next_batch(first)) == 1
+    assert len(coordinator._queues[first]) == 5
+    assert len(coordinator._next_batch(second)) == 1
+    assert len(coordinator._queues[second]) == 2
+    assert len(coordinator._pool) == 3
+
+    coordinator._pool.clear()
+    coordinator._queues[second].clear()
+    coordinator._next_batch(second)
+    assert len(coordinator._queues[first]) == 2
+    assert len(coordinator._queues[second]) == 2
+    coordinator.close()
+
+
+def test_run_local(jobs, defined_rules):
+    """Test that results do not depend on the number of workers."""
+    results, report = run_local(jobs, num_workers=1, defined_rules=defined_rules)
+    parallel_results, parallel_report = run_local(
+        jobs, num_workers=3, defined_rules=defined_rules, batch_size=2
+    )
+
+    assert sorted(results) == list(range(12))
+    assert parallel_results == results
+    assert summarize(results)["wins_a"] + summarize(results)["wins_b"] == 60
+    assert report["workers"] == 1
+    assert parallel_report["workers"] == 3
+    assert parallel_report["rounds"] == report["rounds"]
+    assert parallel_report["rounds_per_second"] > 0
+
+
+def test_run_local_more_workers_than_jobs(jobs, defined_rules):
+    """Test that workers left without jobs are stopped instead of waiting forever."""
+    start = time.monotonic()
+    results, report = run_local(jobs[:1], num_workers=8, defined_rules=defined_rules)
+
+    assert sorted(results) == [0]
+    assert report["workers"] == 8
+    assert time.monotonic() - start < 30
+
+
+def test_late_worker_is_stopped(jobs):
+    """Test that a worker connecting after run returned is told to stop."""
+    coordinator = Coordinator(jobs[:1])
+    coordinator.merge(0, [{"job_id": 0, "wins_a": 1, "wins_b": 0, "draws": 0}])
+    coordinator.run()
+    try:
+        with socket.create_connection(coordinator.address, timeout=5) as conn:
+            with conn.makefile("rwb") as file:
+                _send(file, {"type": "request", "results": []})
+                assert _receive(file) == {"type": "stop"}
+    finally:
+        coordinator.close()
+
+
+def test_worker_failure(jobs, defined_rules):
+    """Test that the jobs of a worker that disconnects are dispatched again."""
+    coordinator = Coordinator(jobs, batch_size=4)
+    thread = threading.Thread(target=coordinator.run)
+    thread.start()
+
+    with socket.create_connection(coordinator.address) as conn:
+        with conn.makefile("rwb") as file:
+            _send(file, {"type": "request", "results": []})
+            assert len(_receive(file)["jobs"]) == 4
+
+    worker = multiprocessing.Process(
+        target=run_worker, args=(*coordinator.address, defined_rules)
+    )
+    worker.start()
+    thread.join(timeout=30)
+    worker.join(timeout=30)
+    coordinator.close()
+
+    assert sorted(coordinator.results) == list(range(12))
+
+
+def test_run_local_all_workers_exit(jobs, defined_rules):
+    """Test that run_local stops when all the workers crashed."""
+    for job in jobs:
+        job["player_a"]["type"] = "HumanPlayer"
+    with pytest.raises(RuntimeError):
+        run_local(jobs, num_workers=2, defined_rules=defined_rules)
+
+
+def test_job_given_up_after_max_attempts(jobs):
+    """Test that a job crashing every worker is given up instead of retried forever."""
+    coordinator = Coordinator(jobs[:1], max_attempts=2)
+    thread = threading.Thread(target=coordinator.run)
+    thread.start()
+
+    take_jobs_and_fail(coordinator.address)
+    take_jobs_and_fail(coordinator.address)
+    thread.join(timeout=10)
+    coordinator.close()
+
+    assert not thread.is_alive()
+    assert coordinator.finished()
+    assert coordinator.failed == [0]
+    assert coordinator.results == {}
+
+
+def test_malformed_message(jobs):
+    """Test that a worker sending a malformed message fails and its jobs are kept."""
+    coordinator = Coordinator(jobs, batch_size=2)
+    thread = threading.Thread(target=coordinator.run, kwargs={"deadline": 1})
+    thread.start()
+
+    taken = take_jobs_and_fail(coordinator.address, {"type": "request"})
+    thread.join(timeout=10)
+    coordinator.close()
+
+    assert len(taken) == 2
+    assert sorted(coordinator._pool) == list(range(12))
+    for job in taken:
+        assert coordinator._attempts[job["job_id"]] == 1
+
+
+def test_heartbeats_keep_slow_workers(jobs, defined_rules, monkeypatch):
+    """Test that a worker running jobs longer than the timeout is not dropped."""
+    original_run_job = distributed.run_job
+
+    def slow_run_job(job, defined_rules):
+        time.sleep(0.5)
+        return original_run_job(job, defined_rules)
+
+    monkeypatch.setattr(distributed, "run_job", slow_run_job)
+    coordinator = Coordinator(jobs[:2], batch_size=2, timeout=0.3)
+    worker = threading.Thread(
+        target=run_worker,
+        args=(*coordinator.address, defined_rules),
+        kwargs={"heartbeat": 0.05},
+    )
+    worker.start()
+    try:
+        results = coordinator.run(deadline=10)
+    finally:
+        worker.join(timeout=10)
+        coordinator.close()
+        logging.disable(logging.NOTSET)
+
+    assert sorted(results) == [0, 1]
+    assert coordinator._attempts == {0: 0, 1: 0}
+
+
+def test_stalled_worker_fails(jobs, defined_rules, monkeypatch):
+    """Test that a worker sending heartbeats but finishing no job is failed."""
+    release = threading.Event()
+    original_run_job = distributed.run_job
+
+    def stuck_run_job(job, defined_rules):
+        release.wait()
+        return original_run_job(job, defined_rules)
+
+    monkeypatch.setattr(distributed, "run_job", stuck_run_job)
+    coordinator = Coordinator(jobs[:1], timeout=1, job_timeout=0.3, max_attempts=1)
+    worker = threading.Thread(
+        target=run_worker,
+        args=(*coordinator.address, defined_rules),
+        kwargs={"heartbeat": 0.05},
+    )
+    worker.start()
+    try:
+        coordinator.run(deadline=10)
+    finally:
+        release.set()
+        worker.join(timeout=10)
+        coordinator.close()
+        logging.disable(logging.NOTSET)
+
+    assert coordinator.finished()
+    assert coordinator.failed == [0]
+    assert coordinator.results == {}
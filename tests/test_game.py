@@ -88,6 +88,45 @@ def test_rule_set_determine_winner(rule_set):
     assert rule_set.determine_winner("Rock", "Rock") is None
 
 
+def test_rule_set_payoff_table(rule_set):
+    """Test that the payoff table agrees with determine_winner."""
+    choices = rule_set.get_choices()
+    table = rule_set.payoff_table()
+    for i, choice_a in enumerate(choices):
+        for j, choice_b in enumerate(choices):
+            result = rule_set.determine_winner(choice_a, choice_b)
+            if result is None:
+                assert table[i][j] == 0
+            elif result[0] == choice_a:
+                assert table[i][j] == 1
+            else:
+                assert table[i][j] == -1
+
+
+def test_rule_set_equilibrium(rule_set):
+    """Test that the equilibrium of the basic rules is uniform."""
+    mix = rule_set.equilibrium()
+    assert set(mix) == {"Rock", "Scissors", "Paper"}
+    assert sum(mix.values()) == pytest.approx(1)
+    assert mix == {"Rock": 1 / 3, "Scissors": 1 / 3, "Paper": 1 / 3}
+
+
+def test_rule_set_equilibrium_unbalanced():
+    """Test that a dominated choice is never played in the equilibrium."""
+    rule_set = RuleSet(
+        {
+            "Rock": {"Scissors": "crushes"},
+            "Scissors": {"Paper": "cuts"},
+            "Paper": {"Rock": "covers", "Well": "covers"},
+            "Well": {"Rock": "drowns", "Scissors": "drowns"},
+        }
+    )
+    mix = rule_set.equilibrium()
+    assert mix["Rock"] == 0
+    for choice in ("Scissors", "Paper", "Well"):
+        assert mix[choice] == pytest.approx(1 / 3)
+
+
 def test_play_best_of(game):
     """Test playing a 'best of' series."""
     game.player_a.choice = lambda choices, history: "Rock"
@@ -1,10 +1,26 @@
 """Tests for the players module."""
 
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
 
 from rps_games.players import ComputerPlayer, HumanPlayer, LLMPlayer
 
 
+@pytest.fixture(autouse=True)
+def clear_latency_windows():
+    """Fixture for starting every test without latencies of previous LLM players."""
+    LLMPlayer._latency_windows.clear()
+    yield
+    LLMPlayer._latency_windows.clear()
+
+
 def test_human_player_choice(monkeypatch):
     """Test that HumanPlayer returns a valid choice when given valid input."""
     player = HumanPlayer("Alice")
@@ -25,6 +41,41 @@ def test_computer_player_choice():
     assert player.choice(choices) in choices
 
 
+def test_computer_player_choices_batch():
+    """Test that ComputerPlayer returns valid choice indices for many games."""
+    player = ComputerPlayer("Bot")
+    choices = ["Rock", "Paper", "Scissors"]
+    batch = player.choices_batch(choices, 100, np.random.default_rng(0))
+    assert batch.shape == (100,)
+    assert ((batch >= 0) & (batch < len(choices))).all()
+
+
+def test_player_choices_batch_fallback(monkeypatch):
+    """Test that the default choices_batch calls choice once per game."""
+    player = HumanPlayer("Alice")
+    choices = ["Rock", "Paper", "Scissors"]
+
+    rng = np.random.default_rng(0)
+
+    monkeypatch.setattr("getpass.getpass", lambda _: "Paper")
+    assert player.choices_batch(choices, 3, rng) == [1, 1, 1]
+
+    monkeypatch.setattr("getpass.getpass", lambda _: "q")
+    with pytest.raises(SystemExit):
+        player.choices_batch(choices, 3, rng)
+
+
+def test_llm_player_choices_batch():
+    """Test that the default choices_batch works for players that need a history."""
+    player = LLMPlayer("TestLLM", rules={}, model=StubModel())
+    choices = ["Rock", "Paper", "Scissors"]
+    assert player.choices_batch(choices, 2, np.random.default_rng(0)) == [0, 0]
+
+    player.model = StubModel(answer="Lizard")
+    with pytest.raises(ValueError):
+        player.choices_batch(choices, 2, np.random.default_rng(0))
+
+
 def test_llm_player_choice():
     """Test that LLMPlayer returns a valid choice based on the model's response."""
     player = LLMPlayer("TestLLM", rules={"Rock": {"Scissors": "crushes"}})
@@ -32,3 +83,131 @@ def test_llm_player_choice():
     history = ["Rock", "Paper"]
 
     assert player.choice(choices, history) in choices
+
+
+class StubModel:
+    """Local stand-in for the LLM whose slow requests are controlled by the test.
+
+    When slow_next is set, the next request blocks until release is set, like a
+    request in the heavy tail of the latency distribution.
+    """
+
+    def __init__(self, answer="Rock"):
+        self.answer = answer
+        self.slow_next = False
+        self.release = threading.Event()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.calls += 1
+            slow, self.slow_next = self.slow_next, False
+        if slow:
+            self.release.wait()
+        return SimpleNamespace(content=self.answer)
+
+
+def wait_until(condition):
+    """Waits for background requests to finish."""
+    for _ in range(500):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_llm_player_hedges_slow_requests():
+    """Test that LLMPlayer sends a duplicate request when the model is slow."""
+    rules = {"Rock": {"Scissors": "crushes"}}
+    model = StubModel()
+    player = LLMPlayer("TestLLM", rules=rules, model=model)
+    choices = ["Rock", "Paper", "Scissors"]
+
+    slow_moves = 0
+    for move in range(40):
+        model.release.clear()
+        model.slow_next = move >= 10 and move % 5 == 0
+        slow_moves += model.slow_next
+        assert player.choice(choices, []) == "Rock"
+        model.release.set()
+
+    report = player.latency_report()
+    assert report["moves"] == 40
+    assert report["hedges"] >= slow_moves
+    assert report["hedge_wins"] >= slow_moves
+    assert report["fallbacks"] == 0
+    # The slow requests that lost are recorded once they finish
+    assert wait_until(lambda: len(player._latencies) == model.calls)
+    assert wait_until(lambda: player.latency_report()["saved_latency"] > 0)
+
+
+def test_llm_player_shares_latencies():
+    """Test that the players of a model share their latencies across games."""
+    rules = {"Rock": {"Scissors": "crushes"}}
+    model = StubModel()
+    first = LLMPlayer("TestLLM", rules=rules, model=model)
+    for _ in range(5):
+        first.choice(["Rock"], [])
+
+    second = LLMPlayer("TestLLM", rules=rules, model=model)
+    assert second._latencies is first._latencies
+    assert second.latency_report()["hedge_after"] is not None
+
+    other = LLMPlayer("TestLLM", rules=rules, model=model, latency_key="other")
+    assert other._latencies is not first._latencies
+    assert other.latency_report()["hedge_after"] is None
+
+
+def test_llm_player_deadline_fallback():
+    """Test that LLMPlayer uses the fallback strategy when the deadline passes."""
+    rules = {"Rock": {"Scissors": "crushes"}}
+    model = StubModel()
+    player = LLMPlayer(
+        "TestLLM",
+        rules=rules,
+        model=model,
+        deadline=0.05,
+        fallback_weights={"Paper": 1.0},
+        max_outstanding=1,
+    )
+    choices = ["Rock", "Paper", "Scissors"]
+
+    model.slow_next = True
+    assert player.choice(choices, []) == "Paper"
+    # The abandoned request still runs, so no new request may be sent
+    assert player.choice(choices, []) == "Paper"
+    model.release.set()
+
+    report = player.latency_report()
+    assert report["fallbacks"] == 2
+    assert report["fallback_rate"] == 1.0
+    assert model.calls == 1
+    assert wait_until(lambda: player._outstanding.acquire(blocking=False))
+    # Only the move that sent a request counts as missing the deadline
+    assert list(player._latencies) == [0.05]
+
+
+def test_llm_player_does_not_block_exit():
+    """Test that a hanging model does not keep the process alive after a move."""
+    script = """
+import threading
+from types import SimpleNamespace
+from rps_games.players import LLMPlayer
+
+class HangingModel:
+    def invoke(self, prompt):
+        threading.Event().wait()
+
+player = LLMPlayer("TestLLM", rules={}, model=HangingModel(), deadline=0.05)
+print(player.choice(["Rock"], []))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    assert result.stdout.strip() == "Rock"
@@ -0,0 +1,110 @@
+"""Tests for the VectorizedGame class."""
+
+import random
+
+import numpy as np
+import pytest
+
+from rps_games.game import RuleSet
+from rps_games.players import ComputerPlayer, HumanPlayer
+from rps_games.vectorized import VectorizedGame
+
+
+@pytest.fixture
+def rule_set():
+    """Fixture for creating a RuleSet instance with the basic rules."""
+    return RuleSet(
+        {
+            "Rock": {"Scissors": "crushes"},
+            "Scissors": {"Paper": "cuts"},
+            "Paper": {"Rock": "covers"},
+        }
+    )
+
+
+def test_play_best_of(rule_set):
+    """Test playing many 'best of' series with fixed choices."""
+    player_a = HumanPlayer("Alice")
+    player_a.choice = lambda choices, history: "Rock"
+    player_b = HumanPlayer("Bob")
+    player_b.choice = lambda choices, history: "Scissors"
+    game = VectorizedGame(player_a, player_b, rule_set, num_games=4)
+
+    winners = game.play(mode="best_of", target=3)
+
+    assert winners.tolist() == [1, 1, 1, 1]
+    assert game.scores_a.tolist() == [3, 3, 3, 3]
+    assert game.scores_b.tolist() == [0, 0, 0, 0]
+    assert game.done.all()
+
+
+def test_play_draw(rule_set):
+    """Test that equal choices result in draws."""
+    player_a = HumanPlayer("Alice")
+    player_a.choice = lambda choices, history: "Paper"
+    player_b = HumanPlayer("Bob")
+    player_b.choice = lambda choices, history: "Paper"
+    game = VectorizedGame(player_a, player_b, rule_set, num_games=2)
+
+    assert game.play(mode="best_of", target=5).tolist() == [0, 0]
+    assert game.rounds.tolist() == [5, 5]
+
+
+def test_play_mixed_modes(rule_set):
+    """Test that every game stops according to its own mode and target."""
+    game = VectorizedGame(
+        ComputerPlayer("Alice"),
+        ComputerPlayer("Bob"),
+        rule_set,
+        num_games=1000,
+        rng=np.random.default_rng(0),
+    )
+    modes = np.where(np.arange(1000) % 2 == 0, "first_to", "best_of")
+    targets = np.arange(1000) % 7 + 1
+
+    winners = game.play(mode=modes, target=targets)
+
+    first_to = modes == "first_to"
+    best_of = ~first_to
+    assert (
+        np.maximum(game.scores_a, game.scores_b)[first_to] == targets[first_to]
+    ).all()
+    assert (winners[first_to] != 0).all()
+    assert (game.rounds[best_of] == targets[best_of]).all()
+    assert (game.scores_a + game.scores_b <= game.rounds).all()
+    assert (game.moves_a == -1).sum() > 0
+
+
+def test_play_is_reproducible(rule_set):
+    """Test that seeding the random module or passing a generator fixes the games."""
+    players = (ComputerPlayer("Alice"), ComputerPlayer("Bob"))
+
+    random.seed(3)
+    first = VectorizedGame(*players, rule_set, num_games=100).play("first_to", 5)
+    random.seed(3)
+    second = VectorizedGame(*players, rule_set, num_games=100).play("first_to", 5)
+    assert (first == second).all()
+
+    third = VectorizedGame(
+        *players, rule_set, num_games=100, rng=np.random.default_rng(3)
+    ).play("first_to", 5)
+    fourth = VectorizedGame(
+        *players, rule_set, num_games=100, rng=np.random.default_rng(3)
+    ).play("first_to", 5)
+    assert (third == fourth).all()
+
+
+def test_init_keeps_random_state(rule_set):
+    """Test that creating a game does not draw from the random module."""
+    state = random.getstate()
+    VectorizedGame(ComputerPlayer("Alice"), ComputerPlayer("Bob"), rule_set, 10)
+    assert random.getstate() == state
+
+
+def test_play_invalid_mode(rule_set):
+    """Test that an invalid game mode is rejected."""
+    game = VectorizedGame(
+        ComputerPlayer("Alice"), ComputerPlayer("Bob"), rule_set, num_games=2
+    )
+    with pytest.raises(ValueError):
+        game.play(mode="most_of", target=3)